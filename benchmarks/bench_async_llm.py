@@ -0,0 +1,66 @@
+# benchmarks/bench_async_llm.py
+"""
+Measure how many concurrent HuggingFaceLLM.acall requests one process
+can keep in flight, against a local HTTP stub that simulates inference
+latency. Requests go over real sockets through the LLM's pooled
+httpx.AsyncClient, so its connection limits are exercised.
+
+Usage: python -m benchmarks.bench_async_llm [concurrency] [latency_s]
+"""
+import asyncio
+import json
+import sys
+import time
+from models.huggingface_llm import HuggingFaceLLM
+
+RESPONSE_BODY = json.dumps([{"generated_text": "[]"}]).encode("utf-8")
+
+
+async def handle_connection(reader: asyncio.StreamReader, writer: asyncio.StreamWriter, latency_s: float):
+    # Minimal HTTP/1.1 keep-alive server: read headers and body, sleep, answer
+    try:
+        while True:
+            head = await reader.readuntil(b"\r\n\r\n")
+            length = 0
+            for line in head.split(b"\r\n"):
+                if line.lower().startswith(b"content-length:"):
+                    length = int(line.split(b":", 1)[1])
+            await reader.readexactly(length)
+            await asyncio.sleep(latency_s)
+            writer.write(
+                b"HTTP/1.1 200 OK\r\nContent-Type: application/json\r\n"
+                + f"Content-Length: {len(RESPONSE_BODY)}\r\n\r\n".encode("ascii")
+                + RESPONSE_BODY
+            )
+            await writer.drain()
+    except (asyncio.IncompleteReadError, ConnectionError):
+        pass
+    finally:
+        writer.close()
+
+
+async def run_benchmark(concurrency: int, latency_s: float):
+    server = await asyncio.start_server(
+        lambda r, w: handle_connection(r, w, latency_s), "127.0.0.1", 0, backlog=concurrency
+    )
+    port = server.sockets[0].getsockname()[1]
+    llm = HuggingFaceLLM(model_name="stub", api_token="stub", api_base=f"http://127.0.0.1:{port}")
+
+    try:
+        start = time.monotonic()
+        results = await asyncio.gather(*(llm.acall(f"prompt {i}") for i in range(concurrency)))
+        elapsed = time.monotonic() - start
+    finally:
+        await llm.aclose()
+        server.close()
+        await server.wait_closed()
+
+    print(f"{len(results)} requests, {latency_s:.2f}s simulated latency each")
+    print(f"wall time: {elapsed:.2f}s (serial would be {concurrency * latency_s:.1f}s)")
+    print(f"throughput: {concurrency / elapsed:.0f} req/s")
+
+
+if __name__ == "__main__":
+    concurrency = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    latency_s = float(sys.argv[2]) if len(sys.argv) > 2 else 0.5
+    asyncio.run(run_benchmark(concurrency, latency_s))
@@ -0,0 +1,72 @@
+# benchmarks/bench_async_runner.py
+"""
+Measure how many arun_interview_process runs one event loop keeps in
+flight, end to end through CrewAI, against a local HTTP stub that plays
+every stage model with a fixed latency. Each run makes three sequential
+model calls (CV, role, questions), so with enough concurrency the wall
+time should stay close to 3 * latency_s however many runs there are.
+
+Usage: python -m benchmarks.bench_async_runner [runs] [latency_s]
+"""
+import asyncio
+import json
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+QUESTIONS = json.dumps([{"q": f"Stub question {i}?", "c": "S"} for i in range(10)])
+PROFILE = json.dumps({"skills": ["Python"], "required_skills": ["Python"]})
+
+
+def make_stub_handler(latency_s: float):
+    class StubHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_POST(self):
+            body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+            time.sleep(latency_s)
+            text = QUESTIONS if '"q"' in body["inputs"] else f"Final Answer: {PROFILE}"
+            data = json.dumps([{"generated_text": text}]).encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, format, *args):
+            pass
+
+    return StubHandler
+
+
+async def run_benchmark(runs: int, latency_s: float):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), make_stub_handler(latency_s))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    # Stage LLMs read the endpoint from the environment when first built
+    os.environ["HF_API_BASE"] = f"http://127.0.0.1:{server.server_port}"
+    from crew.mycrew import CREW_MAX_WORKERS, arun_interview_process
+
+    try:
+        start = time.monotonic()
+        results = await asyncio.gather(*(
+            arun_interview_process(f"CV {i}: Python developer", "Backend Developer", hf_token="stub")
+            for i in range(runs)
+        ))
+        elapsed = time.monotonic() - start
+    finally:
+        server.shutdown()
+
+    stubbed = sum(1 for questions in results if questions[0]["question"].startswith("Stub"))
+    print(f"\n{runs} runs ({stubbed} parsed from the stub), {latency_s:.2f}s per model call, "
+          f"{CREW_MAX_WORKERS} crew workers")
+    print(f"wall time: {elapsed:.2f}s (one run alone is about {3 * latency_s:.1f}s, "
+          f"serial would be {3 * latency_s * runs:.1f}s)")
+
+
+if __name__ == "__main__":
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    latency_s = float(sys.argv[2]) if len(sys.argv) > 2 else 1.0
+    asyncio.run(run_benchmark(runs, latency_s))
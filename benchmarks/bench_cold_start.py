@@ -0,0 +1,58 @@
+# benchmarks/bench_cold_start.py
+"""
+Exercise HuggingFaceLLM's cold-start handling against a local stub that
+answers 503 "model is loading" for the first few seconds, like the HF
+serverless API does for a cold model.
+
+Usage: python -m benchmarks.bench_cold_start [load_s]
+"""
+import json
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from models.huggingface_llm import HuggingFaceLLM, cold_start_metrics
+
+
+def make_stub_handler(load_s: float):
+    ready_at = time.monotonic() + load_s
+
+    class StubHandler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            remaining = ready_at - time.monotonic()
+            if remaining > 0:
+                status, body = 503, {"error": "Model stub is currently loading", "estimated_time": remaining}
+            else:
+                status, body = 200, [{"generated_text": "ok"}]
+            data = json.dumps(body).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, format, *args):
+            pass
+
+    return StubHandler
+
+
+def run_benchmark(load_s: float):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), make_stub_handler(load_s))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    llm = HuggingFaceLLM(model_name="stub", api_token="stub", api_base=f"http://127.0.0.1:{server.server_port}")
+
+    try:
+        for label in ("cold", "warm"):
+            start = time.monotonic()
+            llm.call("hello")
+            print(f"{label} call: {time.monotonic() - start:.2f}s")
+    finally:
+        server.shutdown()
+
+    print(cold_start_metrics.snapshot())
+
+
+if __name__ == "__main__":
+    run_benchmark(float(sys.argv[1]) if len(sys.argv) > 1 else 3.0)
@@ -13,29 +13,41 @@ hf_token = os.getenv("HF_TOKEN")
 pdf_parser_tool = PDFParserTool()
 job_profile_tool = JobProfileTool()
 
-# Define agents
-cv_agent = Agent(
-    role="CV Analyzer",
-    goal="Deeply analyze the candidate's resume and extract structured data including skills, projects, internships, courses, education, and work experience.",
-    backstory="An AI assistant specializing in parsing technical resumes.",
-    tools=[pdf_parser_tool],
-    allow_delegation=False,
-    verbose=True
-)
+# Agent factories; each interview run builds its own agents so concurrent
+# runs never share (and mutate) the same Agent objects
+def create_cv_agent(llm=None) -> Agent:
+    return Agent(
+        role="CV Analyzer",
+        goal="Deeply analyze the candidate's resume and extract structured data including skills, projects, internships, courses, education, and work experience.",
+        backstory="An AI assistant specializing in parsing technical resumes.",
+        tools=[pdf_parser_tool],
+        allow_delegation=False,
+        verbose=True,
+        **({"llm": llm} if llm is not None else {})
+    )
 
-role_agent = Agent(
-    role="Job Role Profiler",
-    goal="Analyze a job title and description to extract a comprehensive technical profile expected from the candidate.",
-    backstory="A job market analyst who understands job trends and technical prerequisites for various roles.",
-    tools=[job_profile_tool],
-    allow_delegation=False,
-    verbose=True
-)
+def create_role_agent(llm=None) -> Agent:
+    return Agent(
+        role="Job Role Profiler",
+        goal="Analyze a job title and description to extract a comprehensive technical profile expected from the candidate.",
+        backstory="A job market analyst who understands job trends and technical prerequisites for various roles.",
+        tools=[job_profile_tool],
+        allow_delegation=False,
+        verbose=True,
+        **({"llm": llm} if llm is not None else {})
+    )
 
-question_agent = Agent(
-    role="Technical Interview Question Creator",
-    goal="Generate challenging, relevant, and contextualized technical questions tailored to the candidate's resume and the target job role.",
-    backstory="A senior technical interviewer who tailors questions to the job and candidate.",
-    allow_delegation=False,
-    verbose=True
-)
+def create_question_agent(llm=None) -> Agent:
+    return Agent(
+        role="Technical Interview Question Creator",
+        goal="Generate challenging, relevant, and contextualized technical questions tailored to the candidate's resume and the target job role.",
+        backstory="A senior technical interviewer who tailors questions to the job and candidate.",
+        allow_delegation=False,
+        verbose=True,
+        **({"llm": llm} if llm is not None else {})
+    )
+
+# Default agents, used by the static tasks in crew/tasks.py
+cv_agent = create_cv_agent()
+role_agent = create_role_agent()
+question_agent = create_question_agent()
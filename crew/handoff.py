@@ -0,0 +1,194 @@
+# crew/handoff.py
+import json
+import re
+from typing import Any, Dict, Iterable, List, Optional, Type, TypeVar
+from pydantic import BaseModel, ValidationError
+from models.schemas import CVData, JobProfile, Skill
+
+ModelT = TypeVar("ModelT", bound=BaseModel)
+
+# Size caps for the question-stage context
+MAX_CONTEXT_CHARS = 1800
+MAX_TEXT_CHARS = 160
+MAX_NAME_CHARS = 60
+
+
+def _extract_json_object(text: str) -> Optional[Dict[str, Any]]:
+    """Return the outermost JSON object in free text, if any."""
+    start, end = text.find('{'), text.rfind('}')
+    if start == -1 or end <= start:
+        return None
+    try:
+        data = json.loads(text[start:end + 1])
+    except json.JSONDecodeError:
+        return None
+    return data if isinstance(data, dict) else None
+
+
+def load_validated(model_cls: Type[ModelT], text: str) -> Optional[ModelT]:
+    """
+    Parse an agent's output into a schema, validating list items one by one
+    so a single malformed entry does not discard the whole profile.
+    Returns None if the output contains no JSON object or none of the
+    schema's fields could be populated, so callers fall back to raw text.
+    """
+    data = _extract_json_object(text)
+    if data is None:
+        return None
+
+    fields = {}
+    for name, field in model_cls.model_fields.items():
+        if name not in data or not isinstance(data[name], list):
+            continue
+        item_type = field.annotation.__args__[0]
+        items = []
+        for item in data[name]:
+            # Models often list skills as plain strings
+            if item_type is Skill and isinstance(item, str):
+                item = {"name": item}
+            try:
+                if isinstance(item_type, type) and issubclass(item_type, BaseModel):
+                    items.append(item_type.model_validate(item))
+                elif isinstance(item, str) and item.strip():
+                    items.append(item.strip())
+            except ValidationError:
+                continue
+        if items:
+            fields[name] = items
+    return model_cls(**fields) if fields else None
+
+
+def _key(text: str) -> str:
+    return re.sub(r"[^a-z0-9+#]+", " ", text.lower()).strip()
+
+
+def _dedupe(values: Iterable[str]) -> List[str]:
+    seen, result = set(), []
+    for value in values:
+        key = _key(value)
+        if key and key not in seen:
+            seen.add(key)
+            result.append(value.strip())
+    return result
+
+
+def _clip(text: str, limit: int = MAX_TEXT_CHARS) -> str:
+    text = " ".join(text.split())
+    return text if len(text) <= limit else text[:limit - 1].rstrip() + "…"
+
+
+def _relevance(text: str, role_terms: List[str]) -> int:
+    key = f" {_key(text)} "
+    return sum(1 for term in role_terms if f" {term} " in key)
+
+
+def _overlaps_role(skill: str, role_terms: List[str]) -> bool:
+    # Match both ways so "Python" overlaps "Server Languages (Python/Java)"
+    key = f" {_key(skill)} "
+    return any(f" {term} " in key or key in f" {term} " for term in role_terms)
+
+
+def build_question_context(cv: Optional[CVData], job: Optional[JobProfile], max_chars: int = MAX_CONTEXT_CHARS,
+                           cv_text: str = "", role_text: str = "") -> str:
+    """
+    Serialize only the fields the question stage needs as compact, canonical
+    JSON: skills overlapping the role first, projects and experience ranked by
+    relevance to the role, everything deduplicated and capped at max_chars.
+    A side that failed validation (cv or job is None) is given as its clipped
+    raw text under "text" instead.
+    """
+    raw = {"cv": cv_text if cv is None else None, "role": role_text if job is None else None}
+    cv = cv or CVData()
+    job = job or JobProfile()
+    role_terms = [_key(term) for term in _dedupe(job.required_skills + job.preferred_tools + job.knowledge_areas)]
+
+    skills = _dedupe(skill.name for skill in cv.skills)
+    skills.sort(key=lambda name: not _overlaps_role(name, role_terms))
+
+    projects = sorted(
+        cv.projects,
+        key=lambda p: -_relevance(" ".join([p.title, p.description] + p.technologies), role_terms),
+    )
+    experience = sorted(
+        cv.experience,
+        key=lambda e: -_relevance(" ".join([e.title] + e.responsibilities), role_terms),
+    )
+    courses = _dedupe(cv.courses)
+    courses.sort(key=lambda course: not _overlaps_role(course, role_terms))
+
+    def serialize(cap: int, text_chars: int) -> Dict[str, Any]:
+        name_chars = min(MAX_NAME_CHARS, text_chars)
+        raw_chars = max_chars // 2 * text_chars // MAX_TEXT_CHARS
+        context = {
+            "role": {
+                "skills": [_clip(x, name_chars) for x in _dedupe(job.required_skills)[:cap]],
+                "tools": [_clip(x, name_chars) for x in _dedupe(job.preferred_tools)[:cap]],
+                "duties": [_clip(r, text_chars) for r in _dedupe(job.responsibilities)[:min(cap, 5)]],
+            },
+            "cv": {
+                "skills": [_clip(x, name_chars) for x in skills[:cap + 3]],
+                "projects": [
+                    {"t": _clip(p.title, name_chars), "d": _clip(p.description, text_chars),
+                     "tech": [_clip(x, name_chars) for x in _dedupe(p.technologies)[:6]]}
+                    for p in projects[:min(cap, 3)]
+                ],
+                "exp": [
+                    {"t": _clip(f"{e.title} @ {e.company}", name_chars),
+                     "r": [_clip(r, text_chars) for r in e.responsibilities[:2]]}
+                    for e in experience[:min(cap, 3)]
+                ],
+                "courses": [_clip(x, name_chars) for x in courses[:min(cap, 6)]],
+                "edu": [_clip(f"{e.degree} in {e.field}", name_chars) for e in cv.education[:2]],
+            },
+        }
+        for section, text in raw.items():
+            if text is not None:
+                context[section] = {"text": _clip(text, raw_chars)}
+        return context
+
+    def dump(context: Dict[str, Any]) -> str:
+        return json.dumps(context, ensure_ascii=False, separators=(",", ":"))
+
+    # Shrink list caps and text lengths until the serialization fits the budget
+    for cap, text_chars in ((12, MAX_TEXT_CHARS), (8, 120), (5, 100), (3, 80), (2, 60), (1, 40)):
+        context = serialize(cap, text_chars)
+        text = dump(context)
+        if len(text) <= max_chars:
+            return text
+
+    # Hard cap: drop the least important sections until it fits
+    for section, key in (("cv", "edu"), ("cv", "courses"), ("cv", "exp"), ("role", "duties"),
+                         ("role", "tools"), ("cv", "projects"), ("cv", "skills"), ("cv", "text"),
+                         ("role", "skills"), ("role", "text")):
+        if context[section].pop(key, None) is None:
+            continue
+        text = dump(context)
+        if len(text) <= max_chars:
+            return text
+    return "{}"
+
+
+def build_handoff(cv_output: str, role_output: str, max_chars: int = MAX_CONTEXT_CHARS) -> Dict[str, Any]:
+    """
+    Turn the CV and role agents' raw outputs into the question-stage context.
+    Whichever side validates is serialized as structured JSON; a side that
+    cannot be parsed is carried as clipped raw text, and if neither parses
+    the context is plain text.
+    """
+    cv = load_validated(CVData, cv_output)
+    job = load_validated(JobProfile, role_output)
+    if cv is not None or job is not None:
+        context = build_question_context(cv, job, max_chars, cv_text=cv_output, role_text=role_output)
+        structured = True
+    else:
+        half = max_chars // 2
+        context = f"CV: {_clip(cv_output, half)}\nRole: {_clip(role_output, half)}"
+        structured = False
+
+    return {
+        "context": context,
+        "structured": structured,
+        "parsed": [side for side, model in (("cv", cv), ("role", job)) if model is not None],
+        "upstream_chars": len(cv_output) + len(role_output),
+        "context_chars": len(context),
+    }
@@ -1,9 +1,18 @@
 from crewai import Crew, Task
-from .agents import cv_agent, role_agent, question_agent
+from crewai import Agent
+from .agents import create_cv_agent, create_role_agent, create_question_agent
 import json
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional, Tuple
 import re
-from models.huggingface_llm import HuggingFaceLLM
+import time
+import asyncio
+import os
+from concurrent.futures import ThreadPoolExecutor
+from models.routing import build_stage_llm, get_stage_route, COMPACT_STOP
+from models.schemas import CompactQuestion, InterviewQuestion, CATEGORY_CODES
+from .handoff import build_handoff
+from pydantic import ValidationError
+from utils.results_store import ResultsStore
 
 
 FALLBACK_QUESTIONS = [
@@ -19,23 +28,12 @@ FALLBACK_QUESTIONS = [
     {"question": "What interests you most about this role?", "category": "General"}
 ]
 
-def run_interview_process(cv_text: str, job_title: str, job_description: str = "", hf_token=None) -> List[Dict[str, str]]:
+def build_profile_crew(agents: Dict[str, Agent], cv_text: str, job_title: str, job_description: str = "") -> Crew:
     """
-    Run the interview question generation process.
+    Build the CV and role tasks, whose outputs are parsed into CVData and JobProfile.
     """
-    # 🧠 Instantiate Hugging Face LLM and assign to agents
-    try:
-        llm = HuggingFaceLLM(api_token=hf_token)
-        cv_agent.llm = llm
-        role_agent.llm = llm
-        question_agent.llm = llm
-        print("✅ Custom HF LLM assigned to agents")
-    except Exception as e:
-        print("❌ LLM initialization failed:", e)
-        return FALLBACK_QUESTIONS
-    
     cv_task = Task(
-    agent=cv_agent,
+    agent=agents["cv"],
     description=f"""Parse the following CV text and extract structured technical details:
         - Technical skills (group by category if possible)
         - Degrees and majors (highlight relevant technical fields)
@@ -43,29 +41,55 @@ def run_interview_process(cv_text: str, job_title: str, job_description: str = "
         - Relevant courses and certifications (especially core subjects in the major)
         - Work experience (with focus on technical responsibilities and outcomes)
 
+        Respond with a single JSON object with keys: skills [{{"name"}}], education [{{"degree", "field", "institution", "year"}}],
+        projects [{{"title", "description", "technologies"}}], courses [string], experience [{{"title", "company", "period", "responsibilities"}}].
+
         CV Text: {str(cv_text)}
         """,
-            expected_output="JSON with: skills, education, projects, courses, experience"
+            expected_output="JSON object matching CVData: skills, education, projects, courses, experience"
         )
 
     role_task = Task(
-    agent=role_agent,
+    agent=agents["role"],
     description=f"""Analyze the job title '{job_title}' and job description '{job_description}' to extract only the technical aspects:
         - Required technical skills and frameworks
         - Key responsibilities with technical context
         - Tools, platforms, or methodologies mentioned
 
         Avoid HR fluff or soft skills.
+        Respond with a single JSON object whose values are lists of strings, with keys:
+        required_skills, preferred_tools, knowledge_areas, responsibilities, prerequisites.
         """,
-            expected_output="JSON with: required_skills, tools, responsibilities"
+            expected_output="JSON object matching JobProfile: required_skills, preferred_tools, knowledge_areas, responsibilities, prerequisites"
         )
 
+    return Crew(
+        agents=[agents["cv"], agents["role"]],
+        tasks=[cv_task, role_task],
+        verbose=True
+    )
+
+
+QUESTION_CONTEXT_LABELS = {
+    True: 'compact JSON; role skills first, CV entries ranked by relevance to the role; '
+          'a "text" field holds an abridged analysis that could not be structured',
+    False: "abridged CV and role analyses",
+}
+
 
-    question_task = Task(
-    agent=question_agent,
+def build_question_task(agent: Agent, context: str, structured: bool = True) -> Task:
+    """
+    Build the question task from the CV/role context produced by crew.handoff;
+    structured says whether that context is compact JSON or plain text.
+    """
+    return Task(
+    agent=agent,
     description="""Act as a senior technical interviewer preparing questions for a candidate based on their CV and the target job role.
 
-        Use the structured CV and role profile to generate **10 concise, specific technical interview questions** that probe the candidate's:
+        Candidate and role ({context_label}):
+        {context}
+
+        Use the CV and role profile to generate **10 concise, specific technical interview questions** that probe the candidate's:
         - **Core technical skills** relevant to the job
         - **Hands-on project experience**, especially real-world applications
         - **Knowledge of tools, frameworks, and algorithms**
@@ -77,61 +101,289 @@ def run_interview_process(cv_text: str, job_title: str, job_description: str = "
         - “What are the trade-offs of using ABC vs DEF in [relevant course/project]?”
         - “Can you optimize a function in [language] that does XYZ?”
 
-        Output format:
-        [
-        {"question": "How did you use TensorFlow in your image classification project?", "category": "Projects"},
-        {"question": "Can you explain how a GRU differs from an LSTM?", "category": "Technical Skills"}
-        ]
-        """,
-            expected_output="JSON array of 10 structured technical questions with 'question' and 'category'"
+        Output ONLY a JSON array of exactly 10 objects, no prose or markdown. Keys: "q" (question), "c" (category code).
+        Category codes: {category_codes}
+        [{{"q":"How did you use TensorFlow in your image classification project?","c":"P"}},{{"q":"How does a GRU differ from an LSTM?","c":"S"}}]
+        """.format(context=context, context_label=QUESTION_CONTEXT_LABELS[structured], category_codes=", ".join(f"{code}={name}" for code, name in CATEGORY_CODES.items())),
+            expected_output="Compact JSON array of 10 objects with 'q' and 'c' keys"
         )
 
 
-    
-    interview_crew = Crew(
-        agents=[cv_agent, role_agent, question_agent],
-        tasks=[cv_task, role_task, question_task],
+def build_question_crew(agents: Dict[str, Agent], context: str, structured: bool = True) -> Crew:
+    return Crew(
+        agents=[agents["question"]],
+        tasks=[build_question_task(agents["question"], context, structured)],
         verbose=True
     )
 
+
+def task_messages(task: Task) -> List[Dict[str, str]]:
+    """
+    Render a tool-free task as chat messages for calling its agent's LLM
+    directly, without CrewAI's Thought/Final Answer scaffolding.
+    """
+    agent = task.agent
+    return [
+        {"role": "system", "content": f"You are {agent.role}. {agent.backstory}\nYour personal goal is: {agent.goal}"},
+        {"role": "user", "content": f"{task.description}\n\nExpected output: {task.expected_output}"},
+    ]
+
+
+def create_stage_agents(hf_token=None) -> Optional[Dict[str, Agent]]:
+    """
+    Build fresh agents for one run, each routed to its own Hugging Face model
+    and token budget. CrewAI mutates agents during kickoff, so runs must not share them.
+    """
+    try:
+        agents = {
+            "cv": create_cv_agent(build_stage_llm("cv", api_token=hf_token)),
+            "role": create_role_agent(build_stage_llm("role", api_token=hf_token)),
+            "question": create_question_agent(build_stage_llm("question", api_token=hf_token)),
+        }
+        print("✅ Per-stage HF LLMs assigned to agents")
+        return agents
+    except Exception as e:
+        print("❌ LLM initialization failed:", e)
+        return None
+
+
+def finalize_questions(output_text: str, timings: Dict[str, float]) -> Dict[str, Any]:
+    """
+    Parse crew output into exactly 10 questions, padding with fallbacks.
+    Returns the run record to store alongside the questions.
+    """
+    print(f"Raw crew output: {output_text}")
+    parse_start = time.monotonic()
+    real_questions, parse_mode = parse_questions_with_mode(output_text)
+    timings["parse_s"] = time.monotonic() - parse_start
+
+    # Pad with fallback if fewer than 10
+    fallback_count = max(0, 10 - len(real_questions))
+    if fallback_count:
+        real_questions.extend(FALLBACK_QUESTIONS[:fallback_count])
+
+    return {
+        "duration_s": sum(timings.values()),
+        "timings": timings,
+        "raw_output": output_text,
+        "questions": real_questions[:10],
+        "fallback_count": fallback_count,
+        "parse_mode": parse_mode,
+        "output_chars": len(output_text),
+    }
+
+
+def _record_run(store: ResultsStore, run: Dict[str, Any]):
+    try:
+        store.record_run(run)
+    except Exception as e:
+        print(f"⚠️ Failed to record run: {str(e)}")
+
+
+def _output_text(result) -> str:
+    return getattr(result, 'raw', None) or getattr(result, 'result', None) or str(result)
+
+
+def _profile_handoff(profile_crew: Crew) -> Dict[str, Any]:
+    cv_task, role_task = profile_crew.tasks
+    handoff = build_handoff(_output_text(cv_task.output), _output_text(role_task.output))
+    print(f"📦 Question context: {handoff['context_chars']} chars "
+          f"(from {handoff['upstream_chars']} upstream, parsed={handoff['parsed'] or 'none'})")
+    return handoff
+
+
+def _handoff_stats(handoff: Dict[str, Any]) -> Dict[str, Any]:
+    return {"context_chars": handoff["context_chars"], "upstream_chars": handoff["upstream_chars"]}
+
+
+def run_interview_process(cv_text: str, job_title: str, job_description: str = "", hf_token=None,
+                          store: Optional[ResultsStore] = None) -> List[Dict[str, str]]:
+    """
+    Run the interview question generation process.
+    If a results store is given, a previous run for the same CV and job is
+    served from it and new runs are recorded in it.
+    """
+    model = get_stage_route("question").model_name
+    if store is not None:
+        cached = store.find_cached(cv_text, job_title, job_description, model=model)
+        if cached:
+            print(f"✅ Serving questions from stored run #{cached['id']}")
+            return cached["questions"]
+
+    agents = create_stage_agents(hf_token)
+    if agents is None:
+        return FALLBACK_QUESTIONS
+
     try:
-        result = interview_crew.kickoff()
-        output_text = getattr(result, 'raw', None) or getattr(result, 'result', None) or str(result)
-        print(f"Raw crew output: {output_text}")
+        start = time.monotonic()
+        profile_crew = build_profile_crew(agents, cv_text, job_title, job_description)
+        profile_crew.kickoff()
+        handoff = _profile_handoff(profile_crew)
+        profile_s = time.monotonic() - start
+
+        result = build_question_crew(agents, handoff["context"], handoff["structured"]).kickoff()
+        run = finalize_questions(_output_text(result), {
+            "profile_s": profile_s,
+            "question_s": time.monotonic() - start - profile_s,
+        })
+
+        if store is not None:
+            _record_run(store, {"cv_text": cv_text, "job_title": job_title, "job_description": job_description,
+                                "model": model, **run, **_handoff_stats(handoff)})
+        return run["questions"]
+
+    except Exception as e:
+        print(f"Error in crew execution: {str(e)}")
+        return FALLBACK_QUESTIONS[:10]
+
+
+# Profile crews run their tools and blocking LLM calls on this pool rather than
+# asyncio's default executor, whose min(32, cpus + 4) workers would cap the
+# number of async runs in flight
+CREW_MAX_WORKERS = int(os.getenv("CREW_MAX_WORKERS", "64"))
+_crew_executor = ThreadPoolExecutor(max_workers=CREW_MAX_WORKERS, thread_name_prefix="crew")
+
+
+async def arun_interview_process(cv_text: str, job_title: str, job_description: str = "", hf_token=None,
+                                 store: Optional[ResultsStore] = None) -> List[Dict[str, str]]:
+    """
+    Async variant of run_interview_process for use on an event loop.
+    Store access runs in a worker thread so the loop is never blocked on SQLite.
+
+    Each run gets its own agents, so concurrent runs are safe. The profile
+    crew uses tools, so CrewAI drives it through the blocking LLM.call() on
+    a CREW_MAX_WORKERS thread pool; up to that many runs profile at once.
+    The question stage has no tools and calls its LLM's acall() directly,
+    so it holds no thread while waiting on the model.
+    """
+    model = get_stage_route("question").model_name
+    if store is not None:
+        cached = await asyncio.to_thread(store.find_cached, cv_text, job_title, job_description, model)
+        if cached:
+            print(f"✅ Serving questions from stored run #{cached['id']}")
+            return cached["questions"]
+
+    agents = create_stage_agents(hf_token)
+    if agents is None:
+        return FALLBACK_QUESTIONS
 
-        real_questions = parse_questions_from_output(output_text)
+    try:
+        start = time.monotonic()
+        profile_crew = build_profile_crew(agents, cv_text, job_title, job_description)
+        await asyncio.get_running_loop().run_in_executor(_crew_executor, profile_crew.kickoff)
+        handoff = _profile_handoff(profile_crew)
+        profile_s = time.monotonic() - start
 
-        # Pad with fallback if fewer than 10
-        if len(real_questions) < 10:
-            remaining = 10 - len(real_questions)
-            real_questions.extend(FALLBACK_QUESTIONS[:remaining])
+        question_task = build_question_task(agents["question"], handoff["context"], handoff["structured"])
+        output_text = await agents["question"].llm.acall(task_messages(question_task))
+        run = finalize_questions(output_text, {
+            "profile_s": profile_s,
+            "question_s": time.monotonic() - start - profile_s,
+        })
 
-        return real_questions[:10]
+        if store is not None:
+            await asyncio.to_thread(_record_run, store, {"cv_text": cv_text, "job_title": job_title,
+                                                         "job_description": job_description, "model": model,
+                                                         **run, **_handoff_stats(handoff)})
+        return run["questions"]
 
     except Exception as e:
         print(f"Error in crew execution: {str(e)}")
         return FALLBACK_QUESTIONS[:10]
 
 
+def _expand_compact_item(item: Any) -> Optional[Dict[str, str]]:
+    """
+    Expand one compact item, remapping unknown category codes instead of
+    rejecting the item. Returns None if it has no question text.
+    """
+    if not isinstance(item, dict) or not isinstance(item.get("q"), str) or not item["q"].strip():
+        return None
+    code = str(item.get("c", "")).strip()
+    try:
+        return CompactQuestion(q=item["q"].strip(), c=code.upper()).expand().model_dump()
+    except ValidationError:
+        pass
+    # Models sometimes emit the full category name, or an unknown code
+    names = {name.lower(): name for name in CATEGORY_CODES.values()}
+    return {"question": item["q"].strip(), "category": names.get(code.lower(), CATEGORY_CODES["G"])}
+
+
+def parse_compact_questions(output_text: str) -> Optional[List[Dict[str, str]]]:
+    """
+    Parse the compact [{"q": ..., "c": ...}] format and expand category codes.
+    Tolerates markdown fences and trailing prose, and drops bad items one by one.
+    Returns None if the text is not in that format.
+    """
+    decoder = json.JSONDecoder()
+    # Prose before the array may contain brackets of its own ("[10 items]"),
+    # so try each '[' until one decodes to a list of objects
+    start = output_text.find('[')
+    while start != -1:
+        text = output_text[start:].rstrip()
+        # The stop sequence may have been stripped from the generated text
+        for candidate in (text, text + COMPACT_STOP[0]):
+            try:
+                items, _ = decoder.raw_decode(candidate)
+            except json.JSONDecodeError:
+                continue
+            if isinstance(items, list) and any(isinstance(item, dict) for item in items):
+                questions = [q for q in (_expand_compact_item(item) for item in items) if q is not None]
+                return questions or None
+            break
+        start = output_text.find('[', start + 1)
+    return None
+
+
+def parse_questions_with_mode(output_text: str) -> Tuple[List[Dict[str, str]], str]:
+    """
+    Parse interview questions and report which parser succeeded:
+    "compact", "json" or "manual".
+    """
+    questions = parse_compact_questions(output_text)
+    if questions is not None:
+        return questions, "compact"
+    questions = _parse_json_questions(output_text)
+    if questions is not None:
+        return questions, "json"
+    return parse_questions_manually(output_text), "manual"
+
+
 def parse_questions_from_output(output_text: str) -> List[Dict[str, str]]:
     """
     Parse interview questions from Crew output text.
     """
+    return parse_questions_with_mode(output_text)[0]
+
+
+def _valid_questions(items: Any) -> Optional[List[Dict[str, str]]]:
+    """Keep only items with a question and a category; None if nothing survives."""
+    if not isinstance(items, list):
+        return None
+    questions = []
+    for item in items:
+        try:
+            questions.append(InterviewQuestion.model_validate(item).model_dump())
+        except ValidationError:
+            continue
+    return questions or None
+
+
+def _parse_json_questions(output_text: str) -> Optional[List[Dict[str, str]]]:
     try:
         json_pattern = r'\[\s*\{[^}]*"question"[^}]*\}[^]]*\]'
         json_match = re.search(json_pattern, output_text, re.DOTALL)
         if json_match:
-            questions = json.loads(json_match.group(0))
-            if isinstance(questions, list):
+            questions = _valid_questions(json.loads(json_match.group(0)))
+            if questions:
                 return questions
         questions = json.loads(output_text)
-        if isinstance(questions, list):
-            return questions
-        elif isinstance(questions, dict) and "questions" in questions:
-            return questions["questions"]
+        if isinstance(questions, dict):
+            questions = questions.get("questions")
+        return _valid_questions(questions)
     except (json.JSONDecodeError, AttributeError):
         pass
-    return parse_questions_manually(output_text)
+    return None
 
 
 def parse_questions_manually(text: str) -> List[Dict[str, str]]:
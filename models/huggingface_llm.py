@@ -1,40 +1,233 @@
 # models/huggingface_llm.py
 from crewai import BaseLLM
 from huggingface_hub import InferenceClient
-from typing import Dict, Any, Optional, Union
+from typing import Dict, Any, List, Optional, Union
 import os
 from dotenv import load_dotenv
 import requests
+import httpx
+import asyncio
+import threading
+import time
+import weakref
+import contextvars
+
+
+class ColdStartMetrics:
+    """
+    Process-wide counters for serverless cold starts, shared by every HuggingFaceLLM.
+    Warm-up and keep-alive pings are counted separately so they do not skew
+    the cold-start rate and added latency seen by user requests.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.cold_starts = 0
+        self.cold_wait_s = 0.0
+        self.by_model: Dict[str, int] = {}
+        self.pings = 0
+        self.ping_cold_starts = 0
+        self.ping_cold_wait_s = 0.0
+
+    def record_request(self, ping: bool = False):
+        with self._lock:
+            if ping:
+                self.pings += 1
+            else:
+                self.requests += 1
+
+    def record_cold_start(self, model_name: str, waited_s: float, ping: bool = False):
+        with self._lock:
+            if ping:
+                self.ping_cold_starts += 1
+                self.ping_cold_wait_s += waited_s
+                return
+            self.cold_starts += 1
+            self.cold_wait_s += waited_s
+            self.by_model[model_name] = self.by_model.get(model_name, 0) + 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "cold_starts": self.cold_starts,
+                "cold_start_rate": self.cold_starts / self.requests if self.requests else 0.0,
+                "cold_wait_s": self.cold_wait_s,
+                "avg_cold_wait_s": self.cold_wait_s / self.cold_starts if self.cold_starts else 0.0,
+                "by_model": dict(self.by_model),
+                "pings": self.pings,
+                "ping_cold_starts": self.ping_cold_starts,
+                "ping_cold_wait_s": self.ping_cold_wait_s,
+            }
+
+
+cold_start_metrics = ColdStartMetrics()
+
+# Cold-start wait of the latest request in the current thread or task, so
+# latency trackers (e.g. HedgedLLM) can exclude it from their samples
+last_cold_wait_s: contextvars.ContextVar[float] = contextvars.ContextVar("last_cold_wait_s", default=0.0)
+
+
+def loading_wait_time(status_code: int, body: Any) -> Optional[float]:
+    """
+    Return the advertised wait if a response is a serverless "model is loading"
+    503, e.g. {"error": "Model ... is currently loading", "estimated_time": 20.0}.
+    """
+    if status_code != 503 or not isinstance(body, dict):
+        return None
+    if "estimated_time" in body:
+        return float(body["estimated_time"])
+    if "loading" in str(body.get("error", "")).lower():
+        return 0.0
+    return None
+
+
+def _json_or_none(response) -> Any:
+    try:
+        return response.json()
+    except ValueError:
+        return None
+
 
 class HuggingFaceLLM(BaseLLM):
-    def __init__(self, model_name: str = "mistralai/Mistral-7B-Instruct-v0.3", api_token: Optional[str] = None, temperature: float = 0.5, max_new_tokens: int = 1024):
-        if api_token is None:
+    def __init__(self, model_name: str = "mistralai/Mistral-7B-Instruct-v0.3", api_token: Optional[str] = None, temperature: float = 0.5, max_new_tokens: int = 1024, timeout: float = 120.0, async_client: Optional[httpx.AsyncClient] = None,
+                 grammar: Optional[Dict[str, Any]] = None, stop: Optional[List[str]] = None,
+                 max_cold_wait: float = 300.0, api_base: Optional[str] = None, token_per_request: bool = False):
+        # With token_per_request, no token is bound to the instance and every
+        # request must pass api_token=..., so one endpoint can serve many users
+        if api_token is None and not token_per_request:
             from dotenv import load_dotenv
             load_dotenv()
             api_token = os.getenv("HF_TOKEN")
 
-        if not api_token:
+        if not api_token and not token_per_request:
             raise ValueError("Hugging Face API token is missing.")
 
-        self.api_url = f"https://api-inference.huggingface.co/models/{model_name}"
-        self.headers = {"Authorization": f"Bearer {api_token}"}
+        self.model_name = model_name
+        self.timeout = timeout
+        self.max_cold_wait = max_cold_wait
+        api_base = api_base or os.getenv("HF_API_BASE", "https://api-inference.huggingface.co")
+        self.api_url = f"{api_base.rstrip('/')}/models/{model_name}"
+        self.headers = {"Authorization": f"Bearer {api_token}"} if api_token else {}
         self.params = {
             "temperature": temperature,
             "max_new_tokens": max_new_tokens,
             "return_full_text": False
         }
+        # Grammar-guided decoding and stop sequences end generation at the closing bracket
+        if grammar:
+            self.params["grammar"] = grammar
+        if stop:
+            self.params["stop"] = stop
+        # An injected client is owned (and closed) by the caller; otherwise one
+        # pooled client is created per event loop, since a client cannot outlive its loop
+        self._async_client = async_client
+        self._loop_clients = weakref.WeakKeyDictionary()
 
-    def call(self, prompt: Union[str, list], **kwargs) -> str:
+    @staticmethod
+    def _format_prompt(prompt: Union[str, list]) -> str:
         if isinstance(prompt, list):
             prompt = "\n".join(
                 item.get("content", str(item)) if isinstance(item, dict) else str(item)
                 for item in prompt
             )
+        return prompt
 
+    def _payload(self, prompt: str) -> Dict[str, Any]:
+        # Generation options are only honoured under "parameters"; top-level
+        # keys are ignored by the inference API, which would void the per-stage budgets
+        return {"inputs": prompt, "parameters": self.params}
+
+    def _headers(self, api_token: Optional[str]) -> Dict[str, str]:
+        if api_token:
+            return {"Authorization": f"Bearer {api_token}"}
+        if not self.headers:
+            raise ValueError("Hugging Face API token is missing.")
+        return self.headers
+
+    def _cold_wait(self, wait_s: float, waited_s: float) -> float:
+        # Poll at least every second, never past the overall cold-start budget
+        return max(1.0, min(wait_s, self.max_cold_wait - waited_s))
+
+    def _post(self, payload: Dict[str, Any], ping: bool = False, api_token: Optional[str] = None) -> Any:
+        """POST to the endpoint, waiting out "model is loading" responses."""
+        headers = self._headers(api_token)
+        cold_start_metrics.record_request(ping)
+        waited_s = 0.0
+        while True:
+            response = requests.post(self.api_url, headers=headers, json=payload, timeout=self.timeout)
+            wait_s = loading_wait_time(response.status_code, _json_or_none(response))
+            if wait_s is None or waited_s >= self.max_cold_wait:
+                break
+            wait_s = self._cold_wait(wait_s, waited_s)
+            print(f"⏳ {self.model_name} is loading, retrying in {wait_s:.0f}s")
+            time.sleep(wait_s)
+            waited_s += wait_s
+
+        last_cold_wait_s.set(waited_s)
+        if waited_s:
+            cold_start_metrics.record_cold_start(self.model_name, waited_s, ping)
+        response.raise_for_status()
+        return response.json()
+
+    def call(self, prompt: Union[str, list], **kwargs) -> str:
+        prompt = self._format_prompt(prompt)
         print("🧠 Prompt sent to HF API:\n", prompt[:1000], "\n...")
-        response = requests.post(self.api_url, headers=self.headers, json={"inputs": prompt, **self.params})
+        return self._post(self._payload(prompt), api_token=kwargs.get("api_token"))[0]["generated_text"]
+
+    def ping(self, api_token: Optional[str] = None) -> bool:
+        """Send a one-token request so the serverless endpoint loads or stays warm."""
+        try:
+            self._post({"inputs": "ping", "parameters": {"max_new_tokens": 1}}, ping=True, api_token=api_token)
+            return True
+        except Exception as e:
+            print(f"⚠️ Ping to {self.model_name} failed: {str(e)}")
+            return False
+
+    def _get_async_client(self) -> httpx.AsyncClient:
+        # One pooled client per loop so hundreds of concurrent calls share connections
+        if self._async_client is not None:
+            return self._async_client
+        loop = asyncio.get_running_loop()
+        client = self._loop_clients.get(loop)
+        if client is None:
+            client = httpx.AsyncClient(
+                timeout=self.timeout,
+                limits=httpx.Limits(max_connections=500, max_keepalive_connections=100),
+            )
+            self._loop_clients[loop] = client
+        return client
+
+    async def _apost(self, payload: Dict[str, Any], ping: bool = False, api_token: Optional[str] = None) -> Any:
+        headers = self._headers(api_token)
+        cold_start_metrics.record_request(ping)
+        client = self._get_async_client()
+        waited_s = 0.0
+        while True:
+            response = await client.post(self.api_url, headers=headers, json=payload)
+            wait_s = loading_wait_time(response.status_code, _json_or_none(response))
+            if wait_s is None or waited_s >= self.max_cold_wait:
+                break
+            wait_s = self._cold_wait(wait_s, waited_s)
+            await asyncio.sleep(wait_s)
+            waited_s += wait_s
+
+        last_cold_wait_s.set(waited_s)
+        if waited_s:
+            cold_start_metrics.record_cold_start(self.model_name, waited_s, ping)
         response.raise_for_status()
-        return response.json()[0]["generated_text"]
+        return response.json()
+
+    async def acall(self, prompt: Union[str, list], **kwargs) -> str:
+        prompt = self._format_prompt(prompt)
+        return (await self._apost(self._payload(prompt), api_token=kwargs.get("api_token")))[0]["generated_text"]
+
+    async def aclose(self):
+        """Close the client this LLM created for the running loop; injected clients are left to the caller."""
+        client = self._loop_clients.pop(asyncio.get_running_loop(), None)
+        if client is not None:
+            await client.aclose()
 
 
 
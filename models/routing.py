@@ -0,0 +1,291 @@
+# models/routing.py
+from crewai import BaseLLM
+from concurrent.futures import Future, FIRST_COMPLETED, wait
+from collections import deque
+from dataclasses import dataclass
+from typing import Dict, Optional, Union
+import asyncio
+import threading
+import time
+import os
+from models.huggingface_llm import HuggingFaceLLM, last_cold_wait_s
+from models.schemas import compact_questions_grammar
+
+# Compact question arrays always end with a closing quote, brace and bracket
+COMPACT_STOP = ['"}]']
+
+
+@dataclass(frozen=True)
+class StageRoute:
+    """Model and generation limits used by one agent stage."""
+    model_name: str
+    max_new_tokens: int
+    temperature: float = 0.5
+    hedge_model: Optional[str] = None
+    structured_output: bool = False
+
+
+# CV extraction and role profiling are simpler than question writing,
+# so they get a tighter token budget and a lower temperature. Question
+# writing emits the compact format, so ten questions fit well under 640.
+STAGE_ROUTES: Dict[str, StageRoute] = {
+    "cv": StageRoute(
+        model_name="mistralai/Mistral-7B-Instruct-v0.3",
+        max_new_tokens=512,
+        temperature=0.2,
+        hedge_model="HuggingFaceH4/zephyr-7b-beta",
+    ),
+    "role": StageRoute(
+        model_name="HuggingFaceH4/zephyr-7b-beta",
+        max_new_tokens=384,
+        temperature=0.2,
+        hedge_model="mistralai/Mistral-7B-Instruct-v0.3",
+    ),
+    "question": StageRoute(
+        model_name="mistralai/Mistral-7B-Instruct-v0.3",
+        max_new_tokens=640,
+        temperature=0.5,
+        hedge_model="HuggingFaceH4/zephyr-7b-beta",
+        structured_output=True,
+    ),
+}
+
+
+def get_stage_route(stage: str) -> StageRoute:
+    """
+    Return the route for a stage, allowing overrides from the environment
+    (e.g. HF_MODEL_CV, HF_MAX_TOKENS_CV, HF_HEDGE_MODEL_CV).
+    """
+    route = STAGE_ROUTES[stage]
+    suffix = stage.upper()
+    return StageRoute(
+        model_name=os.getenv(f"HF_MODEL_{suffix}", route.model_name),
+        max_new_tokens=int(os.getenv(f"HF_MAX_TOKENS_{suffix}", route.max_new_tokens)),
+        temperature=route.temperature,
+        hedge_model=os.getenv(f"HF_HEDGE_MODEL_{suffix}", route.hedge_model) or None,
+        structured_output=route.structured_output,
+    )
+
+
+class HedgedLLM(BaseLLM):
+    """
+    Sends the prompt to a primary LLM and, if it has not answered within a
+    p95-derived deadline, fires the same prompt at an alternate LLM.
+    Whichever answers first wins; the other request is cancelled.
+    Each request runs on its own thread, so the deadline never includes time
+    spent queueing behind other sessions, and at most max_hedges hedges are in
+    flight at once so a slow primary cannot double the load on every call.
+    """
+
+    def __init__(self, primary: BaseLLM, alternate: BaseLLM, initial_deadline: float = 20.0,
+                 min_samples: int = 10, window: int = 100, min_deadline: float = 2.0, max_hedges: int = 4):
+        self.primary = primary
+        self.alternate = alternate
+        self.initial_deadline = initial_deadline
+        self.min_samples = min_samples
+        self.min_deadline = min_deadline
+        self._latencies = deque(maxlen=window)
+        self._lock = threading.Lock()
+        self._hedge_slots = threading.BoundedSemaphore(max_hedges)
+        self.stats = {"calls": 0, "hedged": 0, "hedges_skipped": 0, "alternate_wins": 0}
+
+    def _count(self, key: str):
+        with self._lock:
+            self.stats[key] += 1
+
+    def _record_latency(self, latency_s: float):
+        with self._lock:
+            self._latencies.append(latency_s)
+
+    def hedge_deadline(self) -> float:
+        """Return the p95 latency of recent primary calls, or the initial deadline."""
+        with self._lock:
+            samples = sorted(self._latencies)
+        if len(samples) < self.min_samples:
+            return self.initial_deadline
+        index = min(len(samples) - 1, int(round(0.95 * (len(samples) - 1))))
+        return max(self.min_deadline, samples[index])
+
+    def _timed_call(self, llm: BaseLLM, prompt: Union[str, list], record: bool, **kwargs) -> str:
+        start = time.monotonic()
+        last_cold_wait_s.set(0.0)
+        result = llm.call(prompt, **kwargs)
+        if record:
+            # Cold-start waits would drag the p95 toward the cold-start budget
+            self._record_latency(time.monotonic() - start - last_cold_wait_s.get())
+        return result
+
+    def _spawn(self, llm: BaseLLM, prompt: Union[str, list], record: bool, **kwargs) -> Future:
+        """Run a call on a dedicated daemon thread, so it starts immediately."""
+        future = Future()
+
+        def run():
+            if not future.set_running_or_notify_cancel():
+                return
+            try:
+                future.set_result(self._timed_call(llm, prompt, record, **kwargs))
+            except Exception as e:
+                future.set_exception(e)
+
+        threading.Thread(target=run, name="hedged-llm", daemon=True).start()
+        return future
+
+    def call(self, prompt: Union[str, list], **kwargs) -> str:
+        self._count("calls")
+        primary = self._spawn(self.primary, prompt, True, **kwargs)
+        done, _ = wait([primary], timeout=self.hedge_deadline())
+        if done:
+            return primary.result()
+
+        if not self._hedge_slots.acquire(blocking=False):
+            self._count("hedges_skipped")
+            return primary.result()
+
+        self._count("hedged")
+        print("⏱️ Primary LLM missed its hedge deadline, sending to alternate model")
+        alternate = self._spawn(self.alternate, prompt, False, **kwargs)
+        # The slot is held until the alternate request itself finishes, even if
+        # the primary wins first, so max_hedges bounds requests actually in flight
+        alternate.add_done_callback(lambda _: self._hedge_slots.release())
+        pending = {primary, alternate}
+        last_error = None
+
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                try:
+                    result = future.result()
+                except Exception as e:
+                    last_error = e
+                    continue
+                # A blocking HTTP request cannot be interrupted; the losing
+                # thread finishes on its own and its result is discarded.
+                # A late primary still records its latency when it returns.
+                if future is alternate:
+                    self._count("alternate_wins")
+                return result
+
+        raise last_error
+
+    async def _timed_acall(self, llm: BaseLLM, prompt: Union[str, list], record: bool, **kwargs) -> str:
+        start = time.monotonic()
+        last_cold_wait_s.set(0.0)
+        result = await llm.acall(prompt, **kwargs)
+        if record:
+            self._record_latency(time.monotonic() - start - last_cold_wait_s.get())
+        return result
+
+    async def acall(self, prompt: Union[str, list], **kwargs) -> str:
+        """Async hedged call; unlike call(), the losing request is actually aborted."""
+        self._count("calls")
+        start = time.monotonic()
+        primary = asyncio.ensure_future(self._timed_acall(self.primary, prompt, True, **kwargs))
+        done, _ = await asyncio.wait([primary], timeout=self.hedge_deadline())
+        if done:
+            return primary.result()
+
+        if not self._hedge_slots.acquire(blocking=False):
+            self._count("hedges_skipped")
+            return await primary
+
+        self._count("hedged")
+        alternate = asyncio.ensure_future(self._timed_acall(self.alternate, prompt, False, **kwargs))
+        alternate.add_done_callback(lambda _: self._hedge_slots.release())
+        pending = {primary, alternate}
+        last_error = None
+
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is not None:
+                    last_error = task.exception()
+                    continue
+                for other in pending:
+                    other.cancel()
+                if task is alternate:
+                    self._count("alternate_wins")
+                    if primary in pending:
+                        # Censored sample: the primary took at least this long.
+                        # Dropping it would bias the p95 (and the deadline) downward
+                        self._record_latency(time.monotonic() - start)
+                return task.result()
+
+        raise last_error
+
+
+class StageLLM(BaseLLM):
+    """
+    Binds one caller's API token to a shared per-route LLM, so the token is
+    sent per request and never kept in the process-wide cache.
+    """
+
+    def __init__(self, llm: BaseLLM, api_token: str):
+        self.llm = llm
+        self.api_token = api_token
+
+    def call(self, prompt: Union[str, list], **kwargs) -> str:
+        return self.llm.call(prompt, api_token=self.api_token, **kwargs)
+
+    async def acall(self, prompt: Union[str, list], **kwargs) -> str:
+        return await self.llm.acall(prompt, api_token=self.api_token, **kwargs)
+
+
+# Keyed by stage and route (not token) and reused across runs and users,
+# so the hedge deadline is learned from all traffic to the same models
+_stage_llm_cache: Dict[tuple, BaseLLM] = {}
+_stage_llm_cache_lock = threading.Lock()
+
+
+def resolve_api_token(api_token: Optional[str] = None) -> str:
+    """Return the given token, or HF_TOKEN from the environment."""
+    if api_token is None:
+        from dotenv import load_dotenv
+        load_dotenv()
+        api_token = os.getenv("HF_TOKEN")
+    if not api_token:
+        raise ValueError("Hugging Face API token is missing.")
+    return api_token
+
+
+def get_route_llm(stage: str) -> BaseLLM:
+    """Return the shared, token-free LLM for a stage's current route."""
+    route = get_stage_route(stage)
+    key = (stage, route)
+    with _stage_llm_cache_lock:
+        if key not in _stage_llm_cache:
+            _stage_llm_cache[key] = _create_stage_llm(route)
+        return _stage_llm_cache[key]
+
+
+def build_stage_llm(stage: str, api_token: Optional[str] = None) -> BaseLLM:
+    """
+    Build the LLM for a crew stage ("cv", "role" or "question"): the shared
+    route LLM (a HedgedLLM when the route defines an alternate model) with
+    the caller's token attached per request.
+    """
+    return StageLLM(get_route_llm(stage), resolve_api_token(api_token))
+
+
+def _create_stage_llm(route: StageRoute) -> BaseLLM:
+    decoding = {}
+    if route.structured_output:
+        decoding = {"grammar": compact_questions_grammar(), "stop": COMPACT_STOP}
+
+    primary = HuggingFaceLLM(
+        model_name=route.model_name,
+        temperature=route.temperature,
+        max_new_tokens=route.max_new_tokens,
+        token_per_request=True,
+        **decoding,
+    )
+    if not route.hedge_model:
+        return primary
+
+    alternate = HuggingFaceLLM(
+        model_name=route.hedge_model,
+        temperature=route.temperature,
+        max_new_tokens=route.max_new_tokens,
+        token_per_request=True,
+        **decoding,
+    )
+    return HedgedLLM(primary, alternate)
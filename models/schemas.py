@@ -1,6 +1,6 @@
 # models/schemas.py
 from pydantic import BaseModel, Field
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Literal
 
 class CVContext(BaseModel):
     """Schema for CV data context."""
@@ -26,6 +26,36 @@ class InterviewQuestionList(BaseModel):
     """Schema for a list of interview questions."""
     questions: List[InterviewQuestion] = Field(..., description="List of interview questions")
 
+# Short category codes the model emits; expanded locally to full names
+CATEGORY_CODES: Dict[str, str] = {
+    "S": "Technical Skills",
+    "P": "Projects",
+    "E": "Experience",
+    "C": "Courses",
+    "X": "Problem Solving",
+    "G": "General",
+}
+
+class CompactQuestion(BaseModel):
+    """Schema for a question in the compact generation format."""
+    q: str = Field(..., description="The text of the interview question")
+    c: Literal[tuple(CATEGORY_CODES)] = Field(..., description="Category code, see CATEGORY_CODES")
+
+    def expand(self) -> InterviewQuestion:
+        return InterviewQuestion(question=self.q, category=CATEGORY_CODES[self.c])
+
+def compact_questions_grammar(count: int = 10) -> Dict[str, Any]:
+    """JSON schema grammar constraining generation to exactly `count` compact questions."""
+    return {
+        "type": "json",
+        "value": {
+            "type": "array",
+            "items": CompactQuestion.model_json_schema(),
+            "minItems": count,
+            "maxItems": count,
+        },
+    }
+
 class Skill(BaseModel):
     """Schema for a technical skill."""
     name: str = Field(..., description="Name of the skill")
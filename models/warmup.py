@@ -0,0 +1,78 @@
+# models/warmup.py
+from datetime import datetime
+from typing import Callable, List, Optional
+import threading
+from models.huggingface_llm import HuggingFaceLLM
+from models.routing import HedgedLLM, STAGE_ROUTES, get_route_llm, resolve_api_token
+
+
+def stage_endpoints() -> List[HuggingFaceLLM]:
+    """Return every distinct model endpoint used by the crew stages, hedges included."""
+    endpoints = {}
+    for stage in STAGE_ROUTES:
+        llm = get_route_llm(stage)
+        for endpoint in ([llm.primary, llm.alternate] if isinstance(llm, HedgedLLM) else [llm]):
+            endpoints.setdefault(endpoint.model_name, endpoint)
+    return list(endpoints.values())
+
+
+def warm_up(endpoints: List[HuggingFaceLLM], api_token: Optional[str] = None) -> threading.Thread:
+    """Ping each endpoint in a background thread so models load before the first request."""
+    api_token = resolve_api_token(api_token)
+
+    def run():
+        for endpoint in endpoints:
+            if endpoint.ping(api_token=api_token):
+                print(f"🔥 {endpoint.model_name} is warm")
+
+    thread = threading.Thread(target=run, name="hf-warmup", daemon=True)
+    thread.start()
+    return thread
+
+
+def is_business_hours(now: datetime, start_hour: int = 9, end_hour: int = 18) -> bool:
+    """True on weekdays between start_hour (inclusive) and end_hour (exclusive), local time."""
+    return now.weekday() < 5 and start_hour <= now.hour < end_hour
+
+
+class KeepAlive:
+    """
+    Pings endpoints on an interval during business hours so serverless
+    models are not unloaded between interviews.
+    """
+
+    def __init__(self, endpoints: List[HuggingFaceLLM], api_token: Optional[str] = None, interval_s: float = 600.0,
+                 start_hour: int = 9, end_hour: int = 18, clock: Callable[[], datetime] = datetime.now):
+        self.endpoints = endpoints
+        self.api_token = resolve_api_token(api_token)
+        self.interval_s = interval_s
+        self.start_hour = start_hour
+        self.end_hour = end_hour
+        self.clock = clock
+        self.pings = 0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def tick(self):
+        if not is_business_hours(self.clock(), self.start_hour, self.end_hour):
+            return
+        for endpoint in self.endpoints:
+            endpoint.ping(api_token=self.api_token)
+            self.pings += 1
+
+    def _run(self):
+        while not self._stop.wait(self.interval_s):
+            self.tick()
+
+    def start(self) -> "KeepAlive":
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="hf-keepalive", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
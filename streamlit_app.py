@@ -20,12 +20,33 @@ sys.path.append(project_root)
 # Local utility imports (safe)
 from tools.pdf_parser_tool import PDFParserTool
 from utils.pdf_exporter import export_to_pdf
+from utils.results_store import ResultsStore
 
 # Delay agent setup to avoid slow startup
 def get_interview_runner():
     from crew.mycrew import run_interview_process
     return run_interview_process
 
+# Shared results store so repeated CV/job pairs are served without inference
+@st.cache_resource
+def get_results_store():
+    return ResultsStore()
+
+# Optional warm-up and business-hours keep-alive for the serverless models
+# (HF_WARMUP=1, HF_KEEPALIVE=1); runs once per server process
+@st.cache_resource
+def start_model_warmup(hf_token):
+    from models.warmup import stage_endpoints, warm_up, KeepAlive
+    endpoints = stage_endpoints()
+    if os.getenv("HF_WARMUP") == "1":
+        warm_up(endpoints, api_token=hf_token)
+    if os.getenv("HF_KEEPALIVE") == "1":
+        return KeepAlive(endpoints, api_token=hf_token).start()
+    return None
+
+if DEFAULT_HF_TOKEN and (os.getenv("HF_WARMUP") == "1" or os.getenv("HF_KEEPALIVE") == "1"):
+    start_model_warmup(DEFAULT_HF_TOKEN)
+
 # PDF extraction logic
 def extract_text_from_pdf(file_path):
     parser = PDFParserTool()
@@ -84,7 +105,7 @@ if st.button("🚀 Generate Interview Questions"):
     
     try:
         run_interview = get_interview_runner()
-        questions = run_interview(cv_text, job_title, job_description, hf_token=effective_token)
+        questions = run_interview(cv_text, job_title, job_description, hf_token=effective_token, store=get_results_store())
     
         # Complete the progress bar after successful generation
         progress_bar.progress(100, text="✅ Questions generated!")
@@ -0,0 +1,50 @@
+import threading
+from http.server import ThreadingHTTPServer
+import pytest
+from benchmarks.bench_cold_start import make_stub_handler
+from models.huggingface_llm import HuggingFaceLLM, cold_start_metrics, loading_wait_time
+from models.routing import HedgedLLM
+
+
+@pytest.fixture
+def cold_stub():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), make_stub_handler(load_s=1.0))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_port}"
+    server.shutdown()
+
+
+def test_loading_wait_time():
+    assert loading_wait_time(503, {"error": "Model x is currently loading", "estimated_time": 12.5}) == 12.5
+    assert loading_wait_time(503, {"error": "Model x is currently loading"}) == 0.0
+    assert loading_wait_time(503, {"error": "Service unavailable"}) is None
+    assert loading_wait_time(200, [{"generated_text": "ok"}]) is None
+
+
+def test_cold_start_is_waited_out_and_counted(cold_stub):
+    llm = HuggingFaceLLM(model_name="stub", api_token="stub", api_base=cold_stub)
+    before = cold_start_metrics.snapshot()
+    assert llm.call("hello") == "ok"
+    after = cold_start_metrics.snapshot()
+    assert after["requests"] == before["requests"] + 1
+    assert after["cold_starts"] == before["cold_starts"] + 1
+    assert after["cold_wait_s"] > before["cold_wait_s"]
+
+
+def test_pings_are_recorded_separately(cold_stub):
+    llm = HuggingFaceLLM(model_name="stub", api_token="stub", api_base=cold_stub)
+    before = cold_start_metrics.snapshot()
+    assert llm.ping()
+    after = cold_start_metrics.snapshot()
+    assert after["requests"] == before["requests"]
+    assert after["cold_starts"] == before["cold_starts"]
+    assert after["pings"] == before["pings"] + 1
+    assert after["ping_cold_starts"] == before["ping_cold_starts"] + 1
+
+
+def test_hedge_latency_excludes_cold_start_wait(cold_stub):
+    primary = HuggingFaceLLM(model_name="stub", api_token="stub", api_base=cold_stub)
+    hedged = HedgedLLM(primary, primary, initial_deadline=30.0)
+    assert hedged.call("hello") == "ok"
+    assert len(hedged._latencies) == 1
+    assert hedged._latencies[0] < 0.5
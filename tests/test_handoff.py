@@ -0,0 +1,68 @@
+import json
+from crew.handoff import build_handoff, build_question_context, load_validated, MAX_CONTEXT_CHARS
+from models.schemas import CVData, JobProfile, Project
+
+CV_OUTPUT = json.dumps({
+    "skills": ["Excel", "Python", {"name": "PyTorch"}, "python"],
+    "projects": [
+        {"title": "Budget sheet", "description": "Spreadsheet for expenses", "technologies": ["Excel"]},
+        {"title": "Image classifier", "description": "CNN trained with PyTorch", "technologies": ["PyTorch", "Python"]},
+    ],
+    "courses": ["Art History", "Machine Learning"],
+})
+ROLE_OUTPUT = json.dumps({"required_skills": ["Python", "PyTorch"], "knowledge_areas": ["Machine Learning"]})
+
+
+def test_context_ranks_role_overlap_first_and_dedupes():
+    handoff = build_handoff(CV_OUTPUT, ROLE_OUTPUT)
+    assert handoff["structured"]
+    context = json.loads(handoff["context"])
+    assert context["cv"]["skills"] == ["Python", "PyTorch", "Excel"]
+    assert context["cv"]["projects"][0]["t"] == "Image classifier"
+    assert context["cv"]["courses"][0] == "Machine Learning"
+
+
+def test_json_without_schema_fields_falls_back_to_raw_text():
+    assert load_validated(CVData, '{"name": "John"}') is None
+    handoff = build_handoff('{"name":"John"}', '{"title":"x"}')
+    assert not handoff["structured"]
+    assert "John" in handoff["context"]
+
+
+def test_context_respects_hard_cap_with_huge_fields():
+    cv = CVData(projects=[Project(title="T" * 3000, description="D" * 3000, technologies=["X" * 500] * 20)],
+                skills=[{"name": f"skill{i}" * 50} for i in range(40)])
+    job = JobProfile(required_skills=["R" * 400] * 30, responsibilities=["duty " * 200] * 10)
+    for max_chars in (MAX_CONTEXT_CHARS, 300, 50):
+        text = build_question_context(cv, job, max_chars)
+        assert len(text) <= max_chars
+        json.loads(text)
+
+
+def test_partial_handoff_keeps_the_side_that_validated():
+    handoff = build_handoff(CV_OUTPUT, "The role needs Python and PyTorch experience.")
+    assert handoff["structured"]
+    assert handoff["parsed"] == ["cv"]
+    context = json.loads(handoff["context"])
+    assert context["role"] == {"text": "The role needs Python and PyTorch experience."}
+    assert context["cv"]["projects"][0]["t"] == "Budget sheet"
+
+    handoff = build_handoff("Candidate knows Excel.", ROLE_OUTPUT)
+    context = json.loads(handoff["context"])
+    assert handoff["parsed"] == ["role"]
+    assert context["cv"] == {"text": "Candidate knows Excel."}
+    assert context["role"]["skills"] == ["Python", "PyTorch"]
+
+
+def test_partial_handoff_respects_cap_with_long_raw_text():
+    handoff = build_handoff(CV_OUTPUT, "duty " * 2000, max_chars=600)
+    assert handoff["context_chars"] <= 600
+    assert json.loads(handoff["context"])["role"]["text"]
+
+
+def test_question_prompt_matches_context_kind():
+    from crew.agents import create_question_agent
+    from crew.mycrew import build_question_task
+    agent = create_question_agent()
+    assert "compact JSON" in build_question_task(agent, "{}", structured=True).description
+    assert "compact JSON" not in build_question_task(agent, "CV: x", structured=False).description
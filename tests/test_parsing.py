@@ -0,0 +1,72 @@
+import json
+from crew.mycrew import finalize_questions, parse_compact_questions, parse_questions_with_mode
+
+COMPACT_ITEMS = [{"q": f"How did you use tool {i} in your project?", "c": "SPEXCG"[i % 6]} for i in range(10)]
+COMPACT_TEXT = json.dumps(COMPACT_ITEMS, separators=(",", ":"))
+
+
+def test_compact_expands_category_codes():
+    questions, mode = parse_questions_with_mode(COMPACT_TEXT)
+    assert mode == "compact"
+    assert len(questions) == 10
+    assert questions[0] == {"question": "How did you use tool 0 in your project?", "category": "Technical Skills"}
+    assert questions[1]["category"] == "Projects"
+
+
+def test_compact_inside_markdown_fence():
+    questions, mode = parse_questions_with_mode(f"```json\n{COMPACT_TEXT}\n```")
+    assert mode == "compact"
+    assert len(questions) == 10
+
+
+def test_compact_with_trailing_prose():
+    questions, mode = parse_questions_with_mode(f"Here you go:\n{COMPACT_TEXT}\nLet me know if you need more.")
+    assert mode == "compact"
+    assert len(questions) == 10
+
+
+def test_compact_after_bracketed_prose():
+    questions, mode = parse_questions_with_mode("Here are the questions [10 items]:\n" + COMPACT_TEXT)
+    assert mode == "compact"
+    assert len(questions) == 10
+    assert questions[0]["question"] == COMPACT_ITEMS[0]["q"]
+
+
+def test_compact_with_stop_sequence_stripped():
+    questions = parse_compact_questions(COMPACT_TEXT[:-len('"}]')])
+    assert len(questions) == 10
+    assert questions[-1]["question"] == COMPACT_ITEMS[-1]["q"]
+
+
+def test_unknown_category_code_is_remapped_not_fatal():
+    items = [dict(item) for item in COMPACT_ITEMS]
+    items[3]["c"] = "T"
+    items[4]["c"] = "Projects"
+    items[5]["c"] = "s"
+    questions, mode = parse_questions_with_mode(json.dumps(items))
+    assert mode == "compact"
+    assert len(questions) == 10
+    assert questions[3]["category"] == "General"
+    assert questions[4]["category"] == "Projects"
+    assert questions[5]["category"] == "Technical Skills"
+
+
+def test_compact_items_without_question_are_dropped():
+    items = COMPACT_ITEMS[:8] + [{"c": "S"}, {"q": "", "c": "P"}]
+    run = finalize_questions(json.dumps(items), {})
+    assert run["parse_mode"] == "compact"
+    assert run["fallback_count"] == 2
+
+
+def test_json_parser_rejects_items_without_question_and_category():
+    text = json.dumps([{"foo": "bar"}, {"question": "What is a GRU?", "category": "Technical Skills"}])
+    questions, mode = parse_questions_with_mode(text)
+    assert mode == "json"
+    assert questions == [{"question": "What is a GRU?", "category": "Technical Skills"}]
+
+
+def test_verbose_json_format_still_parses():
+    text = json.dumps({"questions": [{"question": "Explain backpropagation?", "category": "Technical Skills"}]})
+    questions, mode = parse_questions_with_mode(text)
+    assert mode == "json"
+    assert questions[0]["question"] == "Explain backpropagation?"
@@ -0,0 +1,103 @@
+import sqlite3
+import pytest
+from utils.results_store import ResultsStore, hash_job, hash_text
+
+CV_TEXT = "Jane Doe\nPython developer"
+JOB_TITLE = "Backend Engineer"
+QUESTIONS = [{"question": "What is a Python generator?", "category": "Technical Skills"}]
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = ResultsStore(str(tmp_path / "results.sqlite3"))
+    yield store
+    store.close()
+
+
+def make_run(**overrides):
+    run = {"cv_text": CV_TEXT, "job_title": JOB_TITLE, "model": "model-a", "questions": QUESTIONS}
+    run.update(overrides)
+    return run
+
+
+def test_record_run_round_trips(store):
+    run_id = store.record_run(make_run(timings={"total": 1.5}, parse_mode="compact", output_chars=120))
+    [run] = store.list_runs()
+    assert run["id"] == run_id
+    assert run["cv_hash"] == hash_text(CV_TEXT)
+    assert run["job_hash"] == hash_job(JOB_TITLE)
+    assert run["timings"] == {"total": 1.5}
+    assert run["questions"] == QUESTIONS
+    assert run["parse_mode"] == "compact"
+
+
+def test_record_runs_inserts_in_bulk(store):
+    assert store.record_runs(make_run(created_at=float(i)) for i in range(5)) == 5
+    assert len(store.list_runs()) == 5
+
+
+def test_hashes_ignore_whitespace_and_case():
+    assert hash_text("Jane  Doe\n PYTHON") == hash_text("jane doe python")
+
+
+def test_find_cached_skips_runs_with_fallbacks(store):
+    store.record_run(make_run(created_at=1.0, raw_output="clean"))
+    store.record_run(make_run(created_at=2.0, raw_output="fallback", fallback_count=3))
+    cached = store.find_cached("Jane  Doe Python developer", JOB_TITLE)
+    assert cached["raw_output"] == "clean"
+    assert store.find_cached(CV_TEXT, "Frontend Engineer") is None
+
+
+def test_find_cached_filters_by_model(store):
+    store.record_run(make_run(created_at=1.0, model="model-a"))
+    store.record_run(make_run(created_at=2.0, model="model-b"))
+    assert store.find_cached(CV_TEXT, JOB_TITLE)["model"] == "model-b"
+    assert store.find_cached(CV_TEXT, JOB_TITLE, model="model-a")["model"] == "model-a"
+    assert store.find_cached(CV_TEXT, JOB_TITLE, model="model-c") is None
+
+
+def test_list_runs_paginates_through_tied_timestamps(store):
+    # Three runs share each timestamp, so pages must break ties on id
+    store.record_runs(make_run(created_at=float(i // 3)) for i in range(9))
+    store.record_run(make_run(cv_text="Someone else", created_at=5.0))
+    cv_hash = hash_text(CV_TEXT)
+
+    seen, before = [], None
+    while True:
+        page = store.list_runs(cv_hash=cv_hash, before=before, limit=2)
+        if not page:
+            break
+        seen.extend(page)
+        before = (page[-1]["created_at"], page[-1]["id"])
+
+    keys = [(run["created_at"], run["id"]) for run in seen]
+    assert len(keys) == 9
+    assert keys == sorted(keys, reverse=True)
+
+
+def test_list_runs_filters_by_job_and_date(store):
+    store.record_runs([
+        make_run(created_at=10.0),
+        make_run(created_at=20.0),
+        make_run(created_at=30.0, job_title="Data Engineer"),
+    ])
+    runs = store.list_runs(job_hash=hash_job(JOB_TITLE), since=15.0, until=30.0)
+    assert [run["created_at"] for run in runs] == [20.0]
+
+
+def test_older_databases_are_migrated(tmp_path):
+    path = str(tmp_path / "old.sqlite3")
+    conn = sqlite3.connect(path)
+    conn.execute(
+        "CREATE TABLE runs (id INTEGER PRIMARY KEY AUTOINCREMENT, created_at REAL NOT NULL, "
+        "cv_hash TEXT NOT NULL, job_hash TEXT NOT NULL, job_title TEXT NOT NULL, model TEXT NOT NULL, "
+        "duration_s REAL, timings TEXT, raw_output TEXT, questions TEXT NOT NULL, "
+        "fallback_count INTEGER NOT NULL DEFAULT 0)"
+    )
+    conn.commit()
+    conn.close()
+
+    store = ResultsStore(path)
+    store.record_run(make_run(parse_mode="json", context_chars=400, upstream_chars=2000))
+    assert store.parse_stats()["json"]["avg_context_reduction"] == 5.0
+    store.close()
@@ -0,0 +1,137 @@
+import asyncio
+import threading
+import time
+import pytest
+from crewai import BaseLLM
+from models.routing import HedgedLLM, StageLLM, build_stage_llm, get_route_llm, get_stage_route
+
+
+class StandInLLM(BaseLLM):
+    """Answers with a fixed reply after a fixed delay and records each call."""
+
+    def __init__(self, reply: str, delay: float = 0.0):
+        self.reply = reply
+        self.delay = delay
+        self.calls = []
+
+    def call(self, prompt, **kwargs):
+        self.calls.append(kwargs)
+        time.sleep(self.delay)
+        return self.reply
+
+    async def acall(self, prompt, **kwargs):
+        self.calls.append(kwargs)
+        await asyncio.sleep(self.delay)
+        return self.reply
+
+
+def test_stage_route_env_overrides(monkeypatch):
+    monkeypatch.setenv("HF_MODEL_CV", "org/other-model")
+    monkeypatch.setenv("HF_MAX_TOKENS_CV", "256")
+    monkeypatch.setenv("HF_HEDGE_MODEL_CV", "")
+    route = get_stage_route("cv")
+    assert route.model_name == "org/other-model"
+    assert route.max_new_tokens == 256
+    assert route.hedge_model is None
+    assert get_stage_route("role").model_name == "HuggingFaceH4/zephyr-7b-beta"
+
+
+def test_stage_llms_share_a_token_free_backend(monkeypatch):
+    monkeypatch.setenv("HF_MODEL_ROLE", "org/routing-test")
+    first = build_stage_llm("role", api_token="token-a")
+    second = build_stage_llm("role", api_token="token-b")
+    assert first.llm is second.llm is get_route_llm("role")
+    assert first.llm.primary.headers == {}
+
+    monkeypatch.setenv("HF_MAX_TOKENS_ROLE", "128")
+    assert get_route_llm("role") is not first.llm
+
+
+def test_stage_llm_passes_token_per_request():
+    backend = StandInLLM("ok")
+    assert StageLLM(backend, "token-a").call("hi") == "ok"
+    assert asyncio.run(StageLLM(backend, "token-b").acall("hi")) == "ok"
+    assert [c["api_token"] for c in backend.calls] == ["token-a", "token-b"]
+
+
+def test_hedge_deadline_is_p95_of_recent_latencies():
+    hedged = HedgedLLM(StandInLLM("a"), StandInLLM("b"), initial_deadline=20.0, min_samples=10, min_deadline=0.5)
+    assert hedged.hedge_deadline() == 20.0
+    for latency in range(1, 21):
+        hedged._record_latency(float(latency))
+    assert hedged.hedge_deadline() == 19.0
+
+    hedged._latencies.clear()
+    for _ in range(10):
+        hedged._record_latency(0.01)
+    assert hedged.hedge_deadline() == 0.5
+
+
+def test_fast_primary_is_not_hedged():
+    primary, alternate = StandInLLM("primary"), StandInLLM("alternate")
+    hedged = HedgedLLM(primary, alternate, initial_deadline=1.0)
+    assert hedged.call("hi") == "primary"
+    assert not alternate.calls
+    assert hedged.stats["hedged"] == 0
+
+
+def test_slow_primary_is_hedged_and_alternate_wins():
+    hedged = HedgedLLM(StandInLLM("primary", delay=1.0), StandInLLM("alternate"), initial_deadline=0.1)
+    start = time.monotonic()
+    assert hedged.call("hi") == "alternate"
+    assert time.monotonic() - start < 0.5
+    assert hedged.stats["hedged"] == 1
+    assert hedged.stats["alternate_wins"] == 1
+
+
+def test_hedge_slot_is_held_until_alternate_finishes():
+    # The primary wins just after the deadline while the alternate is still running
+    hedged = HedgedLLM(StandInLLM("primary", delay=0.2), StandInLLM("alternate", delay=1.0),
+                       initial_deadline=0.1, max_hedges=1)
+    assert hedged.call("hi") == "primary"
+    assert hedged.call("hi") == "primary"
+    assert hedged.stats["hedged"] == 1
+    assert hedged.stats["hedges_skipped"] == 1
+
+
+def test_concurrent_hedges_are_capped():
+    hedged = HedgedLLM(StandInLLM("primary", delay=0.5), StandInLLM("alternate", delay=0.3),
+                       initial_deadline=0.1, max_hedges=2)
+    threads = [threading.Thread(target=hedged.call, args=("hi",)) for _ in range(6)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert hedged.stats["calls"] == 6
+    assert hedged.stats["hedged"] == 2
+    assert hedged.stats["hedges_skipped"] == 4
+
+
+def test_async_alternate_win_records_censored_primary_latency():
+    hedged = HedgedLLM(StandInLLM("primary", delay=1.0), StandInLLM("alternate", delay=0.1), initial_deadline=0.1)
+    assert asyncio.run(hedged.acall("hi")) == "alternate"
+    assert hedged.stats["alternate_wins"] == 1
+    assert len(hedged._latencies) == 1
+    assert 0.15 < hedged._latencies[0] < 1.0
+
+
+def test_async_hedge_slot_is_released_when_alternate_finishes():
+    hedged = HedgedLLM(StandInLLM("primary", delay=0.2), StandInLLM("alternate", delay=0.5),
+                       initial_deadline=0.1, max_hedges=1)
+
+    async def run():
+        assert await hedged.acall("hi") == "primary"
+        # The primary won, so the alternate task was cancelled and its slot freed
+        await asyncio.sleep(0)
+        assert await hedged.acall("hi") == "primary"
+
+    asyncio.run(run())
+    assert hedged.stats["hedged"] == 2
+    assert hedged.stats["hedges_skipped"] == 0
+
+
+def test_missing_token_is_rejected(monkeypatch):
+    monkeypatch.delenv("HF_TOKEN", raising=False)
+    monkeypatch.setattr("dotenv.load_dotenv", lambda *args, **kwargs: False)
+    with pytest.raises(ValueError):
+        build_stage_llm("cv")
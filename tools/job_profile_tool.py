@@ -65,6 +65,6 @@ class JobProfileTool(BaseTool):
             
         return str(response)
 
-    def _arun(self, job_title: str, job_description: str = "") -> str:
-        """Run the tool asynchronously."""
-        raise NotImplementedError("This tool does not support async")
\ No newline at end of file
+    async def _arun(self, job_title: str, job_description: str = "") -> str:
+        """Run the tool asynchronously. The lookup is in-memory, so no executor is needed."""
+        return self._run(job_title, job_description)
\ No newline at end of file
@@ -2,6 +2,7 @@
 from crewai.tools import BaseTool
 from pydantic import BaseModel, PrivateAttr
 from typing import Type
+import asyncio
 import fitz  # PyMuPDF
 
 class PDFParserArgs(BaseModel):
@@ -23,6 +24,7 @@ class PDFParserTool(BaseTool):
         except Exception as e:
             return f"Error parsing PDF: {str(e)}"
 
-    def _arun(self, file_path: str) -> str:
-        """Run the tool asynchronously."""
-        raise NotImplementedError("This tool does not support async")
\ No newline at end of file
+    async def _arun(self, file_path: str) -> str:
+        """Run the tool asynchronously, offloading PyMuPDF to the default executor."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, self._run, file_path)
\ No newline at end of file
@@ -0,0 +1,211 @@
+# utils/results_store.py
+import sqlite3
+import hashlib
+import json
+import os
+import threading
+import time
+from typing import List, Dict, Any, Optional, Iterable, Tuple
+
+DEFAULT_DB_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "db", "results.sqlite3")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    created_at REAL NOT NULL,
+    cv_hash TEXT NOT NULL,
+    job_hash TEXT NOT NULL,
+    job_title TEXT NOT NULL,
+    model TEXT NOT NULL,
+    duration_s REAL,
+    timings TEXT,
+    raw_output TEXT,
+    questions TEXT NOT NULL,
+    fallback_count INTEGER NOT NULL DEFAULT 0,
+    parse_mode TEXT,
+    output_chars INTEGER,
+    context_chars INTEGER,
+    upstream_chars INTEGER
+);
+CREATE INDEX IF NOT EXISTS idx_runs_cv ON runs (cv_hash, created_at);
+CREATE INDEX IF NOT EXISTS idx_runs_job ON runs (job_hash, created_at);
+CREATE INDEX IF NOT EXISTS idx_runs_created ON runs (created_at);
+CREATE INDEX IF NOT EXISTS idx_runs_lookup ON runs (cv_hash, job_hash, model, created_at);
+"""
+
+# Columns added to SCHEMA after the runs table was first introduced; new
+# databases get them from SCHEMA, databases created before get them here
+MIGRATIONS = {
+    "parse_mode": "ALTER TABLE runs ADD COLUMN parse_mode TEXT",
+    "output_chars": "ALTER TABLE runs ADD COLUMN output_chars INTEGER",
+    "context_chars": "ALTER TABLE runs ADD COLUMN context_chars INTEGER",
+    "upstream_chars": "ALTER TABLE runs ADD COLUMN upstream_chars INTEGER",
+}
+
+INSERT_RUN = """
+INSERT INTO runs (created_at, cv_hash, job_hash, job_title, model, duration_s, timings, raw_output, questions,
+                  fallback_count, parse_mode, output_chars, context_chars, upstream_chars)
+VALUES (:created_at, :cv_hash, :job_hash, :job_title, :model, :duration_s, :timings, :raw_output, :questions,
+        :fallback_count, :parse_mode, :output_chars, :context_chars, :upstream_chars)
+"""
+
+
+def hash_text(text: str) -> str:
+    """Hash text after normalizing whitespace so re-extracted CVs still match."""
+    normalized = " ".join(str(text).split()).lower()
+    return hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+
+
+def hash_job(job_title: str, job_description: str = "") -> str:
+    """Hash a job title and description together."""
+    return hash_text(f"{job_title}\n{job_description}")
+
+
+class ResultsStore:
+    """
+    Local SQLite store for interview generation runs, indexed by
+    candidate (CV hash), job hash and date.
+    """
+
+    def __init__(self, db_path: str = DEFAULT_DB_PATH):
+        self.db_path = db_path
+        os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+        self._migrate()
+
+    def _migrate(self):
+        columns = {row["name"] for row in self._conn.execute("PRAGMA table_info(runs)")}
+        with self._conn:
+            for column, statement in MIGRATIONS.items():
+                if column not in columns:
+                    self._conn.execute(statement)
+
+    def close(self):
+        self._conn.close()
+
+    @staticmethod
+    def _to_row(run: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            "created_at": run.get("created_at", time.time()),
+            "cv_hash": run.get("cv_hash") or hash_text(run["cv_text"]),
+            "job_hash": run.get("job_hash") or hash_job(run["job_title"], run.get("job_description", "")),
+            "job_title": run["job_title"],
+            "model": run["model"],
+            "duration_s": run.get("duration_s"),
+            "timings": json.dumps(run.get("timings") or {}),
+            "raw_output": run.get("raw_output"),
+            "questions": json.dumps(run.get("questions") or []),
+            "fallback_count": run.get("fallback_count", 0),
+            "parse_mode": run.get("parse_mode"),
+            "output_chars": run.get("output_chars"),
+            "context_chars": run.get("context_chars"),
+            "upstream_chars": run.get("upstream_chars"),
+        }
+
+    @staticmethod
+    def _from_row(row: sqlite3.Row) -> Dict[str, Any]:
+        run = dict(row)
+        run["timings"] = json.loads(run["timings"] or "{}")
+        run["questions"] = json.loads(run["questions"])
+        return run
+
+    def record_run(self, run: Dict[str, Any]) -> int:
+        """
+        Record a single run. Expects job_title, model and either cv_text or
+        cv_hash; optional keys are duration_s, timings, raw_output, questions.
+        """
+        with self._lock, self._conn:
+            cursor = self._conn.execute(INSERT_RUN, self._to_row(run))
+        return cursor.lastrowid
+
+    def record_runs(self, runs: Iterable[Dict[str, Any]]) -> int:
+        """Bulk insert runs in a single transaction. Returns the number inserted."""
+        rows = [self._to_row(run) for run in runs]
+        with self._lock, self._conn:
+            self._conn.executemany(INSERT_RUN, rows)
+        return len(rows)
+
+    def find_cached(self, cv_text: str, job_title: str, job_description: str = "",
+                    model: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """Return the latest run without fallback questions for this CV and job, if any."""
+        query = "SELECT * FROM runs WHERE cv_hash = ? AND job_hash = ? AND fallback_count = 0"
+        params: List[Any] = [hash_text(cv_text), hash_job(job_title, job_description)]
+        if model:
+            query += " AND model = ?"
+            params.append(model)
+        query += " ORDER BY created_at DESC LIMIT 1"
+
+        with self._lock:
+            row = self._conn.execute(query, params).fetchone()
+        return self._from_row(row) if row else None
+
+    def list_runs(self, cv_hash: Optional[str] = None, job_hash: Optional[str] = None,
+                  since: Optional[float] = None, until: Optional[float] = None,
+                  before: Optional[Tuple[float, int]] = None, limit: int = 50) -> List[Dict[str, Any]]:
+        """
+        List runs newest first, filtered by candidate, job and date range.
+        Paginate by passing the last returned run's (created_at, id) as
+        before. Ordering matches the (cv_hash, created_at) and
+        (job_hash, created_at) indexes, whose implicit rowid suffix breaks
+        ties, so each page is read straight off the index without sorting.
+        """
+        clauses, params = [], []
+        if cv_hash:
+            clauses.append("cv_hash = ?")
+            params.append(cv_hash)
+        if job_hash:
+            clauses.append("job_hash = ?")
+            params.append(job_hash)
+        if since is not None:
+            clauses.append("created_at >= ?")
+            params.append(since)
+        if until is not None:
+            clauses.append("created_at < ?")
+            params.append(until)
+        if before is not None:
+            clauses.append("(created_at, id) < (?, ?)")
+            params.extend(before)
+
+        query = "SELECT * FROM runs"
+        if clauses:
+            query += " WHERE " + " AND ".join(clauses)
+        query += " ORDER BY created_at DESC, id DESC LIMIT ?"
+        params.append(limit)
+
+        with self._lock:
+            rows = self._conn.execute(query, params).fetchall()
+        return [self._from_row(row) for row in rows]
+
+    def parse_stats(self, since: Optional[float] = None, model: Optional[str] = None) -> Dict[str, Dict[str, Any]]:
+        """
+        Summarize output size, parser outcome and question-context reduction
+        per parse mode, so output length and fallback rate can be tracked.
+        """
+        clauses, params = ["parse_mode IS NOT NULL"], []
+        if since is not None:
+            clauses.append("created_at >= ?")
+            params.append(since)
+        if model:
+            clauses.append("model = ?")
+            params.append(model)
+
+        query = (
+            "SELECT parse_mode, COUNT(*) AS runs, AVG(output_chars) AS avg_output_chars, "
+            "AVG(fallback_count) AS avg_fallback_count, "
+            "AVG(CAST(upstream_chars AS REAL) / NULLIF(context_chars, 0)) AS avg_context_reduction "
+            "FROM runs WHERE "
+            + " AND ".join(clauses) + " GROUP BY parse_mode"
+        )
+        with self._lock:
+            rows = self._conn.execute(query, params).fetchall()
+
+        total = sum(row["runs"] for row in rows) or 1
+        return {
+            row["parse_mode"]: {**dict(row), "share": row["runs"] / total}
+            for row in rows
+        }